@@ -1,10 +1,13 @@
 from typing import Dict, Any
+import asyncio
 import logging
+import os
 import shutil
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, UploadFile, File
 
 from backend.services.content_generator import content_generator
+from backend.services.document_parser import document_parser
 from backend.schemas.generation import AnalysisRequest
 
 logger = logging.getLogger(__name__)
@@ -84,14 +87,11 @@ async def parse_document(request: AnalysisRequest) -> Dict[str, Any]:
         if not Path(request.file_path).exists():
             raise HTTPException(status_code=404, detail="文件不存在")
 
-        from backend.services.document_parser import document_parser
-        result = document_parser.parse_document(Path(request.file_path))
+        result = await asyncio.to_thread(document_parser.parse_document, Path(request.file_path))
         
-        # 提取文档内容预览（前1000字符）
-        content_preview = ""
-        if result["documents"]:
-            full_content = "\n".join([doc.page_content for doc in result["documents"]])
-            content_preview = full_content[:1000] + "..." if len(full_content) > 1000 else full_content
+        # 提取文档内容预览（前1000字符），全文已在解析时拼接并缓存
+        full_content = result["content"]
+        content_preview = full_content[:1000] + "..." if len(full_content) > 1000 else full_content
         
         return {
             "status": "success",
@@ -114,12 +114,15 @@ async def list_uploaded_files() -> Dict[str, Any]:
         files = []
         
         if UPLOAD_DIR.exists():
-            for file_path in UPLOAD_DIR.iterdir():
-                if file_path.is_file():
-                    stat = file_path.stat()
+            # scandir的目录项自带文件类型，is_file()无需额外stat
+            with os.scandir(UPLOAD_DIR) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
                     files.append({
-                        "name": file_path.name,
-                        "path": str(file_path),
+                        "name": entry.name,
+                        "path": str(UPLOAD_DIR / entry.name),
                         "size": stat.st_size,
                         "created_at": stat.st_ctime,
                         "modified_at": stat.st_mtime
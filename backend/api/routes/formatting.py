@@ -248,11 +248,12 @@ async def list_output_files() -> Dict[str, Any]:
         
         if output_dir.exists():
             for file_path in output_dir.glob("*.docx"):
+                stat = file_path.stat()
                 files.append({
                     "name": file_path.name,
                     "path": str(file_path),
-                    "size": file_path.stat().st_size,
-                    "created_time": file_path.stat().st_ctime
+                    "size": stat.st_size,
+                    "created_time": stat.st_ctime
                 })
         
         # 按创建时间倒序排列
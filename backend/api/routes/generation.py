@@ -1,8 +1,14 @@
 from typing import Dict, Any
+import asyncio
+import json
 import logging
+import uuid
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 
+from backend.api.routes.projects import projects_db
 from backend.models.project import ProjectStatus
 from backend.services.content_generator import content_generator
 from backend.schemas.generation import (
@@ -21,6 +27,14 @@ def update_task_progress(task_id: str, progress: int, step: str, error: str = No
             generation_tasks[task_id]["status"] = "failed"
             generation_tasks[task_id]["error"] = error
         generation_tasks[task_id]["updated_at"] = datetime.now()
+        _notify_task_update(task_id)
+
+
+def _notify_task_update(task_id: str):
+    """唤醒等待该任务状态变化的事件流"""
+    event = _task_events.pop(task_id, None)
+    if event:
+        event.set()
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +43,15 @@ router = APIRouter(prefix="/generation", tags=["generation"])
 # 简单的任务状态存储
 generation_tasks: Dict[str, Dict[str, Any]] = {}
 
+# 任务状态变化通知：task_id -> 等待中的事件
+_task_events: Dict[str, asyncio.Event] = {}
+
+# SSE心跳间隔（秒），任务状态无变化时定期发送以保持连接
+TASK_EVENT_HEARTBEAT = 15.0
+
+# 长轮询最长挂起时间（秒）
+TASK_STATUS_MAX_WAIT = 30.0
+
 
 @router.post("/full")
 async def generate_full_proposal(
@@ -38,8 +61,6 @@ async def generate_full_proposal(
     """生成完整投标方案"""
     try:
         # 获取项目信息
-        from backend.api.routes.projects import projects_db
-        
         if request.project_id not in projects_db:
             raise HTTPException(status_code=404, detail="项目不存在")
         
@@ -50,7 +71,6 @@ async def generate_full_proposal(
         project.updated_at = datetime.now()
         
         # 创建任务ID
-        import uuid
         task_id = str(uuid.uuid4())
         
         # 记录任务状态
@@ -130,13 +150,20 @@ async def generate_section(request: SectionGenerationRequest) -> Dict[str, Any]:
 
 
 @router.get("/task/{task_id}")
-async def get_task_status(task_id: str) -> Dict[str, Any]:
-    """获取生成任务状态"""
+async def get_task_status(task_id: str, wait: float = 0) -> Dict[str, Any]:
+    """获取生成任务状态，wait>0时挂起直到状态变化或超时"""
     try:
         if task_id not in generation_tasks:
             raise HTTPException(status_code=404, detail="任务不存在")
         
         task = generation_tasks[task_id]
+        if wait > 0 and task.get("status") not in ("completed", "failed"):
+            event = _task_events.setdefault(task_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(wait, TASK_STATUS_MAX_WAIT))
+            except asyncio.TimeoutError:
+                pass
+            task = generation_tasks.get(task_id, task)
         
         return {
             "status": "success",
@@ -150,6 +177,40 @@ async def get_task_status(task_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/task/{task_id}/events")
+async def stream_task_events(task_id: str) -> StreamingResponse:
+    """以SSE方式推送生成任务状态变化"""
+    if task_id not in generation_tasks:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def event_stream():
+        last_snapshot = None
+        while True:
+            # 先登记事件再读取状态，避免错过两者之间发生的更新
+            event = _task_events.setdefault(task_id, asyncio.Event())
+            task = generation_tasks.get(task_id)
+            if task is None:
+                break
+
+            # 只有状态、进度或步骤变化时才推送
+            snapshot = (task.get("status"), task.get("progress"), task.get("current_step"))
+            if snapshot != last_snapshot:
+                last_snapshot = snapshot
+                payload = json.dumps(jsonable_encoder(task), ensure_ascii=False)
+                yield f"data: {payload}\n\n"
+
+            if task.get("status") in ("completed", "failed"):
+                _task_events.pop(task_id, None)
+                break
+
+            try:
+                await asyncio.wait_for(event.wait(), timeout=TASK_EVENT_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/outputs")
 async def list_output_files() -> Dict[str, Any]:
     """获取输出文件列表"""
@@ -196,6 +257,7 @@ async def _run_full_generation_task(task_id: str, project, document_path: str, t
                     "document_path": result["document_path"]
                 }
             })
+            _notify_task_update(task_id)
             
             logger.info(f"生成任务完成: {task_id}")
             
@@ -210,6 +272,7 @@ async def _run_full_generation_task(task_id: str, project, document_path: str, t
                 "error": result["error"],
                 "completed_at": datetime.now()
             })
+            _notify_task_update(task_id)
             
             logger.error(f"生成任务失败: {task_id}, 错误: {result['error']}")
             
@@ -226,3 +289,4 @@ async def _run_full_generation_task(task_id: str, project, document_path: str, t
             "error": str(e),
             "completed_at": datetime.now()
         })
+        _notify_task_update(task_id)
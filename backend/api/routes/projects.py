@@ -3,6 +3,7 @@ import logging
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from fastapi.responses import FileResponse
 import uuid
+from datetime import datetime
 from pathlib import Path
 
 from backend.models.project import Project, ProjectStatus
@@ -15,6 +16,9 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 # 简单的内存存储（实际项目中应使用数据库）
 projects_db: Dict[str, Project] = {}
 
+# Word文档的MIME类型
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
 
 @router.post("/", response_model=ProjectResponse)
 async def create_project(project_data: ProjectCreate) -> ProjectResponse:
@@ -120,7 +124,6 @@ async def update_project(project_id: str, project_data: ProjectUpdate) -> Projec
         if project_data.enable_differentiation is not None:
             project.enable_differentiation = project_data.enable_differentiation
         
-        from datetime import datetime
         project.updated_at = datetime.now()
         
         logger.info(f"更新项目成功: {project.name} (ID: {project_id})")
@@ -182,7 +185,7 @@ async def download_project_document(project_id: str):
         return FileResponse(
             path=str(file_path),
             filename=f"{project.name}_技术方案.docx",
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            media_type=DOCX_MEDIA_TYPE
         )
         
     except HTTPException:
@@ -1,6 +1,7 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
@@ -27,6 +28,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 压缩较大的JSON响应（任务状态轮询、输出文件列表等）
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # 注册路由
 app.include_router(projects.router, prefix="/api")
 app.include_router(documents.router, prefix="/api")
@@ -3,6 +3,7 @@
 """
 import json
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
@@ -16,11 +17,12 @@ class ConfigManager:
     """配置管理器 - 支持动态配置和持久化，优先使用TOML格式"""
 
     def __init__(self):
-        # 优先使用TOML格式，回退到JSON
-        self.toml_config_file = Path("config/dynamic_config.toml")
-        self.json_config_file = Path("config/dynamic_config.json")
+        # 优先使用TOML格式，回退到JSON；配置目录可通过环境变量 AIBIDDING_CONFIG_DIR 指定（如测试时指向tmpfs）
+        config_dir = Path(os.environ.get("AIBIDDING_CONFIG_DIR", "config"))
+        self.toml_config_file = config_dir / "dynamic_config.toml"
+        self.json_config_file = config_dir / "dynamic_config.json"
         self.config_file = self.toml_config_file if self.toml_config_file.exists() else self.json_config_file
-        self.config_file.parent.mkdir(exist_ok=True)
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
         
         # 默认配置
         self.default_config = {
@@ -238,6 +240,18 @@ class ConfigManager:
     def get_workflow_config(self) -> Dict[str, Any]:
         """获取工作流配置"""
         return self.get("workflow", {})
+
+    def get_max_concurrency(self) -> int:
+        """获取LLM调用的最大并发数（关闭并发生成时为1）"""
+        if not self.get("workflow.enable_concurrent_generation", True):
+            return 1
+        # 配置接口或环境覆盖可能写入字符串，按整数解析，无法解析时使用默认值
+        try:
+            max_concurrency = int(self.get("workflow.max_concurrent_tasks", 5))
+        except (TypeError, ValueError):
+            logger.warning("workflow.max_concurrent_tasks 配置无效，使用默认值5")
+            max_concurrency = 5
+        return max(1, max_concurrency)
     
     def get_formatting_config(self) -> Dict[str, Any]:
         """获取格式化配置"""
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -9,6 +10,7 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from backend.models.generation import WorkflowState
 from backend.models.project import Project
 from backend.services.document_parser import document_parser
+from backend.services.llm_service import llm_service
 from backend.services.workflow_engine import workflow_engine
 
 logger = logging.getLogger(__name__)
@@ -28,9 +30,9 @@ class ContentGenerator:
         logger.info(f"开始生成投标方案，项目: {project.name}")
 
         try:
-            # 1. 解析文档
-            document_result = document_parser.parse_document(Path(document_path))
-            document_content = "\n".join([doc.page_content for doc in document_result["documents"]])
+            # 1. 解析文档（放到线程池中执行，避免阻塞事件循环）
+            document_result = await asyncio.to_thread(document_parser.parse_document, Path(document_path))
+            document_content = document_result["content"]
 
             # 2. 创建工作流状态
             workflow_state = WorkflowState(
@@ -74,7 +76,12 @@ class ContentGenerator:
 
     async def _generate_word_document(self, project: Project, state: WorkflowState,
                                       template_path: Optional[str] = None) -> Path:
-        """生成Word文档 - 使用模板样式"""
+        """生成Word文档 - 使用模板样式（在线程池中执行，避免阻塞事件循环）"""
+        return await asyncio.to_thread(self._build_word_document, project, state, template_path)
+
+    def _build_word_document(self, project: Project, state: WorkflowState,
+                             template_path: Optional[str] = None) -> Path:
+        """加载模板、写入章节并保存Word文档（同步阻塞操作）"""
         logger.info(f"开始生成Word文档，项目: {project.name}")
 
         # 确定模板路径
@@ -95,9 +102,11 @@ class ContentGenerator:
             p = paragraph._element
             p.getparent().remove(p)
 
+        style_names = self._get_style_names(doc)
+
         # 添加标题
         title_para = doc.add_paragraph(f'{project.name} - 技术方案')
-        if self._has_style(doc, "标书1级"):
+        if "标书1级" in style_names:
             title_para.style = "标书1级"
         else:
             title_para.style = "Heading 1"
@@ -105,7 +114,7 @@ class ContentGenerator:
 
         # 添加目录占位符
         toc_para = doc.add_paragraph('目录')
-        if self._has_style(doc, "标书2级"):
+        if "标书2级" in style_names:
             toc_para.style = "标书2级"
         else:
             toc_para.style = "Heading 2"
@@ -121,7 +130,7 @@ class ContentGenerator:
             # 添加章节标题 - 使用模板样式
             title_para = doc.add_paragraph(section["title"])
             style_name = self._get_title_style(section["level"])
-            if self._has_style(doc, style_name):
+            if style_name in style_names:
                 title_para.style = style_name
             else:
                 # 回退到标准样式
@@ -146,7 +155,7 @@ class ContentGenerator:
                         else:
                             # 正文使用标书正文样式
                             content_para = doc.add_paragraph(para)
-                            if self._has_style(doc, "标书正文"):
+                            if "标书正文" in style_names:
                                 content_para.style = "标书正文"
                             else:
                                 content_para.style = "Normal"
@@ -161,15 +170,12 @@ class ContentGenerator:
 
         return file_path
 
-    def _has_style(self, doc: Document, style_name: str) -> bool:
-        """检查文档是否有指定样式"""
+    def _get_style_names(self, doc: Document) -> frozenset:
+        """一次性收集文档中的全部样式名称，供后续逐段落判断"""
         try:
-            for style in doc.styles:
-                if style.name == style_name:
-                    return True
-            return False
-        except:
-            return False
+            return frozenset(style.name for style in doc.styles)
+        except Exception:
+            return frozenset()
 
     def _get_title_style(self, level: int) -> str:
         """根据级别获取标题样式名称"""
@@ -189,9 +195,9 @@ class ContentGenerator:
         logger.info(f"开始分析需求，文档: {document_path}")
 
         try:
-            # 解析文档
-            document_result = document_parser.parse_document(Path(document_path))
-            document_content = "\n".join([doc.page_content for doc in document_result["documents"]])
+            # 解析文档（放到线程池中执行，避免阻塞事件循环）
+            document_result = await asyncio.to_thread(document_parser.parse_document, Path(document_path))
+            document_content = document_result["content"]
 
             # 创建简化的工作流状态
             workflow_state = WorkflowState(
@@ -201,7 +207,6 @@ class ContentGenerator:
             )
 
             # 只运行需求分析步骤
-            from backend.services.llm_service import llm_service
             result = await llm_service.analyze_requirements(document_content)
 
             if result["status"] == "success":
@@ -233,7 +238,6 @@ class ContentGenerator:
         logger.info("开始生成提纲")
 
         try:
-            from backend.services.llm_service import llm_service
             result = await llm_service.generate_outline(requirements_analysis)
 
             if result["status"] == "success":
@@ -260,7 +264,6 @@ class ContentGenerator:
         logger.info(f"开始生成章节内容: {section_title}")
 
         try:
-            from backend.services.llm_service import llm_service
             result = await llm_service.generate_content(section_title, requirements, context)
 
             if result["status"] == "success":
@@ -1,9 +1,13 @@
 """
 文档格式化服务 - 独立的格式化功能
 """
+import asyncio
+import io
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import re
 
@@ -14,11 +18,18 @@ from docx.enum.style import WD_STYLE_TYPE
 
 logger = logging.getLogger(__name__)
 
+# 标题识别规则（单次匹配覆盖全部格式），模块加载时编译一次
+_TITLE_RE = re.compile(
+    r'^(?:(\d+(?:\.\d+)*)\s+(.+)'              # 数字编号格式: 1. 1.1 1.1.1 等
+    r'|(#+)(.*)'                                # Markdown格式: # ## ### 等
+    r'|[一二三四五六七八九十]+[、．]\s*(.+))$'    # 中文序号格式: 一、二、三、等
+)
+
 
 class DocumentFormatter:
     """文档格式化器 - 独立的格式化服务"""
     
-    def __init__(self):
+    def __init__(self, template_cache_size: int = 4):
         self.default_template_path = Path("tests/data/投标文件template.docx")
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
@@ -42,6 +53,11 @@ class DocumentFormatter:
             "center_title": True,
             "process_diagrams": True
         }
+
+        # 已清空内容的模板缓存：模板路径 -> (mtime_ns, 文件大小, docx字节)，只保留最近使用的少量模板
+        self.template_cache_size = template_cache_size
+        self._template_cache: "OrderedDict[str, Tuple[int, int, bytes]]" = OrderedDict()
+        self._template_cache_lock = threading.Lock()
     
     async def format_raw_text(self, raw_text: str, project_name: str = "格式化文档", 
                              template_path: Optional[str] = None) -> Path:
@@ -127,33 +143,29 @@ class DocumentFormatter:
     
     def _detect_title(self, line: str) -> Optional[tuple]:
         """检测标题行并返回(level, title)"""
-        # 数字编号格式: 1. 1.1 1.1.1 等
-        number_pattern = r'^(\d+(?:\.\d+)*)\s+(.+)$'
-        match = re.match(number_pattern, line)
-        if match:
-            number_part = match.group(1)
-            title = match.group(2)
-            level = len(number_part.split('.'))
-            return (level, title)
-        
-        # Markdown格式: # ## ### 等
-        if line.startswith('#'):
-            level = len(line) - len(line.lstrip('#'))
-            title = line.lstrip('#').strip()
-            return (level, title)
-        
-        # 中文序号格式: 一、二、三、等
-        chinese_pattern = r'^[一二三四五六七八九十]+[、．]\s*(.+)$'
-        if re.match(chinese_pattern, line):
-            title = re.match(chinese_pattern, line).group(1)
-            return (1, title)
-        
-        return None
+        match = _TITLE_RE.match(line)
+        if not match:
+            return None
+
+        number_part, number_title, hashes, markdown_title, chinese_title = match.groups()
+        if number_part is not None:
+            return (number_part.count('.') + 1, number_title)  # 编号段数 = 分隔点数 + 1
+        if hashes is not None:
+            return (len(hashes), markdown_title.strip())
+        return (1, chinese_title)
     
     async def _create_formatted_document(self, sections: List[Dict[str, Any]], 
                                        project_name: str,
                                        template_path: Optional[str] = None) -> Path:
-        """创建格式化的Word文档"""
+        """创建格式化的Word文档（在线程池中执行，避免阻塞事件循环）"""
+        return await asyncio.to_thread(
+            self._build_formatted_document, sections, project_name, template_path
+        )
+
+    def _build_formatted_document(self, sections: List[Dict[str, Any]],
+                                  project_name: str,
+                                  template_path: Optional[str] = None) -> Path:
+        """加载模板、写入章节并保存Word文档（同步阻塞操作）"""
         # 确定模板路径
         if template_path and Path(template_path).exists():
             template_doc_path = Path(template_path)
@@ -163,17 +175,17 @@ class DocumentFormatter:
         # 创建文档
         if template_doc_path.exists():
             logger.info(f"使用模板: {template_doc_path}")
-            doc = Document(str(template_doc_path))
-            # 清空模板内容，保留样式
-            self._clear_document_content(doc)
+            doc = self._load_template(template_doc_path)
         else:
             logger.warning(f"模板文件不存在: {template_doc_path}，使用空白文档")
             doc = Document()
+
+        style_names = self._get_style_names(doc)
         
         # 添加标题
         if self.format_config["center_title"]:
             title_para = doc.add_paragraph(f'{project_name}')
-            if self._has_style(doc, self.style_mapping["title"]):
+            if self.style_mapping["title"] in style_names:
                 title_para.style = self.style_mapping["title"]
             else:
                 title_para.style = "Heading 1"
@@ -182,7 +194,7 @@ class DocumentFormatter:
         # 添加目录
         if self.format_config["include_toc"]:
             toc_para = doc.add_paragraph('目录')
-            if self._has_style(doc, self.style_mapping[2]):
+            if self.style_mapping[2] in style_names:
                 toc_para.style = self.style_mapping[2]
             else:
                 toc_para.style = "Heading 2"
@@ -202,7 +214,7 @@ class DocumentFormatter:
             level = section.get("level", 1)
             style_name = self._get_title_style(level)
             
-            if self._has_style(doc, style_name):
+            if style_name in style_names:
                 title_para.style = style_name
             else:
                 title_para.style = f"Heading {min(level, 9)}"
@@ -218,7 +230,7 @@ class DocumentFormatter:
                 for para in paragraphs:
                     para = para.strip()
                     if para:
-                        self._add_content_paragraph(doc, para)
+                        self._add_content_paragraph(doc, para, style_names)
         
         # 保存文档
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -230,6 +242,33 @@ class DocumentFormatter:
         
         return file_path
     
+    def _load_template(self, template_doc_path: Path) -> Document:
+        """加载已清空内容的模板，同一模板文件只解析和清空一次"""
+        stat = template_doc_path.stat()
+        cache_key = str(template_doc_path.resolve())
+
+        with self._template_cache_lock:
+            cached = self._template_cache.get(cache_key)
+            if cached is not None:
+                self._template_cache.move_to_end(cache_key)
+
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            data = cached[2]
+        else:
+            doc = Document(str(template_doc_path))
+            # 清空模板内容，保留样式
+            self._clear_document_content(doc)
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            data = buffer.getvalue()
+            with self._template_cache_lock:
+                self._template_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, data)
+                self._template_cache.move_to_end(cache_key)
+                if len(self._template_cache) > self.template_cache_size:
+                    self._template_cache.popitem(last=False)
+
+        return Document(io.BytesIO(data))
+
     def _clear_document_content(self, doc: Document):
         """清空文档内容，保留样式"""
         # 清空段落
@@ -242,15 +281,12 @@ class DocumentFormatter:
             t = table._element
             t.getparent().remove(t)
     
-    def _has_style(self, doc: Document, style_name: str) -> bool:
-        """检查文档是否有指定样式"""
+    def _get_style_names(self, doc: Document) -> frozenset:
+        """一次性收集文档中的全部样式名称，供后续逐段落判断"""
         try:
-            for style in doc.styles:
-                if style.name == style_name:
-                    return True
-            return False
-        except:
-            return False
+            return frozenset(style.name for style in doc.styles)
+        except Exception:
+            return frozenset()
     
     def _get_title_style(self, level: int) -> str:
         """根据级别获取标题样式名称"""
@@ -265,7 +301,7 @@ class DocumentFormatter:
         # 这里可以扩展为将mermaid/plantuml转换为图片
         return content
     
-    def _add_content_paragraph(self, doc: Document, para_text: str):
+    def _add_content_paragraph(self, doc: Document, para_text: str, style_names: frozenset):
         """添加内容段落"""
         # 检查是否是代码块
         if para_text.startswith('```') and para_text.endswith('```'):
@@ -275,7 +311,7 @@ class DocumentFormatter:
         else:
             # 正文使用标书正文样式
             content_para = doc.add_paragraph(para_text)
-            if self._has_style(doc, self.style_mapping["content"]):
+            if self.style_mapping["content"] in style_names:
                 content_para.style = self.style_mapping["content"]
             else:
                 content_para.style = "Normal"
@@ -1,20 +1,36 @@
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, Tuple
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_unstructured import UnstructuredLoader
 
 
 class DocumentParser:
-    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 200, cache_size: int = 4):
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
         )
+        # 解析结果缓存：(路径, 修改时间, 文件大小) -> 解析结果，文件变化后自动失效；
+        # 每条结果含全文的多份副本，只保留最近的少量文档
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def parse_document(self, file_path: Path) -> Dict[str, Any]:
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+
+        cache_key = (str(file_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
 
         try:
             loader = UnstructuredLoader(
@@ -27,17 +43,26 @@ class DocumentParser:
         except Exception as e:
             raise ValueError(f"Failed to parse document: {e}")
 
-        return {
+        result = {
             "file_name": file_path.name,
             "file_type": file_path.suffix,
             "documents": documents,
             "chunks": chunks,
+            # 全文只拼接一次，随解析结果一起缓存
+            "content": "\n".join(doc.page_content for doc in documents),
             "metadata": {
                 "total_pages": len(documents),
                 "total_chunks": len(chunks),
             }
         }
 
+        with self._cache_lock:
+            self._cache[cache_key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return result
+
 
 # 全局实例
 document_parser = DocumentParser()
@@ -0,0 +1,68 @@
+"""
+LLM结果缓存 - 对完全相同的输入复用已生成的内容
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """基于输入哈希的LLM结果磁盘缓存，设置环境变量 AIBIDDING_LLM_CACHE=1 时启用"""
+
+    def __init__(self, cache_dir: Path = Path(".cache/llm")):
+        self.cache_dir = cache_dir
+        self.enabled = os.environ.get("AIBIDDING_LLM_CACHE") == "1"
+
+    @staticmethod
+    def make_key(key_parts: Iterable[Any]) -> str:
+        """根据输入生成缓存键"""
+        payload = json.dumps(list(key_parts), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def cached_call(self, fn: Callable[[], Awaitable[Dict[str, Any]]],
+                          key_parts: Iterable[Any]) -> Dict[str, Any]:
+        """命中缓存时直接返回结果，否则调用fn并缓存成功的结果（文件读写在线程池中执行）"""
+        if not self.enabled:
+            return await fn()
+
+        cache_file = self.cache_dir / f"{self.make_key(key_parts)}.json"
+        cached = await asyncio.to_thread(self._read, cache_file)
+        if cached is not None:
+            return cached
+
+        result = await fn()
+
+        if result.get("status") == "success":
+            await asyncio.to_thread(self._write, cache_file, result)
+
+        return result
+
+    def _read(self, cache_file: Path) -> Optional[Dict[str, Any]]:
+        """读取缓存文件，不存在或读取失败时返回None"""
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取LLM缓存失败: {e}")
+        return None
+
+    def _write(self, cache_file: Path, result: Dict[str, Any]):
+        """写入缓存文件，失败时只记录警告"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"写入LLM缓存失败: {e}")
+
+
+# 全局实例
+llm_cache = LLMCache()
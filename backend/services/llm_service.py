@@ -1,11 +1,12 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
 from backend.core.toml_config import toml_config
 from backend.services.config_manager import config_manager
+from backend.services.llm_cache import llm_cache
 from backend.services.llm_manager import llm_manager
 
 logger = logging.getLogger(__name__)
@@ -246,21 +247,10 @@ class LLMService:
                 HumanMessage(content=user_prompt)
             ]
 
-            # 使用新的LLM管理器生成（支持重试和格式验证）
-            result = await self.llm_manager.generate_with_retry(messages)
-
-            if result["status"] == "success":
-                return {
-                    "outline": result["content"],
-                    "status": "success"
-                }
-            else:
-                # 回退到直接调用
-                response = await self.llm.ainvoke(messages)
-                return {
-                    "outline": response.content,
-                    "status": "success"
-                }
+            return await llm_cache.cached_call(
+                lambda: self._invoke_outline(messages),
+                [toml_config.llm.model_name, system_prompt, user_prompt]
+            )
         except Exception as e:
             logger.error(f"IPTV提纲生成失败: {e}")
             return {
@@ -269,6 +259,32 @@ class LLMService:
                 "error": str(e)
             }
 
+    async def _invoke_outline(self, messages: list) -> Dict[str, Any]:
+        """调用LLM生成提纲，管理器失败时回退到直接调用"""
+        # 使用新的LLM管理器生成（支持重试和格式验证）
+        result = await self.llm_manager.generate_with_retry(messages)
+
+        if result["status"] == "success":
+            return {
+                "outline": result["content"],
+                "status": "success"
+            }
+
+        # 回退到直接调用
+        response = await self.llm.ainvoke(messages)
+        return {
+            "outline": response.content,
+            "status": "success"
+        }
+
+    async def _invoke_content(self, messages: list) -> Dict[str, Any]:
+        """调用LLM并返回内容结果"""
+        response = await self.llm.ainvoke(messages)
+        return {
+            "content": response.content,
+            "status": "success"
+        }
+
     async def generate_iptv_section_content(self, section_title: str, section_path: str,
                                           document_content: str) -> Dict[str, Any]:
         """生成IPTV领域的章节内容 - 使用优化的prompt"""
@@ -329,12 +345,10 @@ class LLMService:
                 HumanMessage(content=user_prompt)
             ]
 
-            response = await self.llm.ainvoke(messages)
-
-            return {
-                "content": response.content,
-                "status": "success"
-            }
+            return await llm_cache.cached_call(
+                lambda: self._invoke_content(messages),
+                [toml_config.llm.model_name, full_system_prompt, user_prompt]
+            )
         except Exception as e:
             logger.error(f"IPTV章节内容生成失败: {e}")
             return {
@@ -343,9 +357,9 @@ class LLMService:
                 "error": str(e)
             }
 
-    async def generate_parent_summary(self, parent_title: str, parent_path: str,
-                                    children_content: str, document_content: str) -> Dict[str, Any]:
-        """生成父节点总结内容"""
+    def _build_parent_summary_messages(self, parent_title: str, parent_path: str,
+                                       children_content: str, document_content: str) -> list:
+        """构建父节点总结的消息列表"""
         # 从配置管理器获取优化后的prompt
         system_prompt = config_manager.get_prompt("parent_summary_prompt", """
         你是一位资深的技术方案编写专家，精通广电IPTV领域。请为父级章节生成高质量的总结性内容。
@@ -399,12 +413,19 @@ class LLMService:
         5. 严格使用纯文本格式，保证阅读流畅
         """
 
-        try:
-            messages = [
-                SystemMessage(content=full_system_prompt),
-                HumanMessage(content=user_prompt)
-            ]
+        return [
+            SystemMessage(content=full_system_prompt),
+            HumanMessage(content=user_prompt)
+        ]
+
+    async def generate_parent_summary(self, parent_title: str, parent_path: str,
+                                    children_content: str, document_content: str) -> Dict[str, Any]:
+        """生成父节点总结内容"""
+        messages = self._build_parent_summary_messages(
+            parent_title, parent_path, children_content, document_content
+        )
 
+        try:
             response = await self.llm.ainvoke(messages)
 
             return {
@@ -419,6 +440,29 @@ class LLMService:
                 "error": str(e)
             }
 
+    async def batch_generate_parent_summary(self, items: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """批量生成父节点总结，一次提交所有请求，结果顺序与输入一致
+
+        items中每项包含 parent_title、parent_path、children_content、document_content
+        """
+        messages_list = [self._build_parent_summary_messages(**item) for item in items]
+        max_concurrency = config_manager.get_max_concurrency()
+
+        responses = await self.llm.abatch(
+            messages_list,
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+
+        results = []
+        for item, response in zip(items, responses):
+            if isinstance(response, Exception):
+                logger.error(f"父节点总结生成失败: {item['parent_title']}, 错误: {response}")
+                results.append({"content": "", "status": "error", "error": str(response)})
+            else:
+                results.append({"content": response.content, "status": "success"})
+        return results
+
 
 # 全局实例
 llm_service = LLMService()
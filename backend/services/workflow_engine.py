@@ -1,7 +1,9 @@
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import logging
 import asyncio
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 import re
 
 from langgraph.graph import StateGraph, END
@@ -9,10 +11,60 @@ from langgraph.graph.state import CompiledStateGraph
 
 from backend.models.generation import WorkflowState, GenerationTaskStatus
 from backend.services.llm_service import llm_service
+from backend.services.config_manager import config_manager
 from backend.services.document_parser import document_parser
 
 logger = logging.getLogger(__name__)
 
+# 一次扫描判断内容中是否可能含有markdown标记
+_MARKDOWN_MARKER_RE = re.compile(r'[#*_`>\[]|^\s*(?:[-+]|\d+\.)\s|^-{3,}$', re.MULTILINE)
+
+_EXTRA_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# 文档预处理：合并仅含空白的空行
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
+# markdown清理规则（顺序敏感），模块加载时编译一次
+_MARKDOWN_CLEANUP_RULES = [
+    (re.compile(r'^#{1,6}\s+', re.MULTILINE), ''),             # 标题标记
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1'),                    # 粗体
+    (re.compile(r'\*([^*]+)\*'), r'\1'),                        # 斜体
+    (re.compile(r'__([^_]+)__'), r'\1'),                        # 粗体
+    (re.compile(r'_([^_]+)_'), r'\1'),                          # 斜体
+    (re.compile(r'^[\s]*[-*+]\s+', re.MULTILINE), ''),          # 无序列表标记
+    (re.compile(r'^[\s]*\d+\.\s+', re.MULTILINE), ''),          # 有序列表标记
+    (re.compile(r'```[\s\S]*?```'), ''),                        # 代码块
+    (re.compile(r'`([^`]+)`'), r'\1'),                          # 行内代码
+    (re.compile(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),              # 链接
+    (re.compile(r'^>\s+', re.MULTILINE), ''),                   # 引用标记
+    (re.compile(r'^[-*_]{3,}$', re.MULTILINE), ''),             # 水平分割线
+    (_EXTRA_BLANK_LINES_RE, '\n\n'),                            # 多余的空行
+]
+
+
+# 数字编号标题：1.1 ~ 1.1.1.1.1 或 "1." 形式，一次匹配同时得到级别和标题
+_NUMBERED_TITLE_RE = re.compile(r'^(?:(\d+(?:\.\d+){1,4})|(\d+)\.)\s+(.+)$')
+
+
+@lru_cache(maxsize=1024)
+def _parse_numbered_title_line(line: str) -> Tuple[int, str]:
+    """解析数字编号格式的标题（纯函数，按行缓存结果）"""
+    line = line.strip()
+
+    # 2~5级为"1.1 标题"形式，1级为"1. 标题"形式
+    match = _NUMBERED_TITLE_RE.match(line)
+    if match:
+        number, _, title = match.groups()
+        level = number.count('.') + 1 if number else 1
+        return level, title.strip()
+
+    # 如果没有匹配到数字编号格式，检查是否是纯文本标题
+    if line and not line.startswith('#') and not line.startswith('-') and not line.startswith('*'):
+        # 可能是没有编号的标题，默认为1级
+        return 1, line
+
+    return 0, ""  # 无法解析
+
 
 class SectionNode:
     """章节节点类，用于构建层次化目录树"""
@@ -26,31 +78,33 @@ class SectionNode:
         self.content = ""
         self.is_generated = False
         self.is_leaf = True
+        self._path: Optional[str] = None  # get_path的缓存
 
     def add_child(self, child: 'SectionNode'):
         """添加子节点"""
         child.parent = self
+        child._path = None
         self.children.append(child)
         self.is_leaf = False
 
-    def get_all_leaf_nodes(self) -> List['SectionNode']:
-        """获取所有叶子节点"""
-        if self.is_leaf:
-            return [self]
-
-        leaf_nodes = []
-        for child in self.children:
-            leaf_nodes.extend(child.get_all_leaf_nodes())
-        return leaf_nodes
+    def get_all_leaf_nodes(self) -> Iterator['SectionNode']:
+        """按前序依次产出所有叶子节点"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf:
+                yield node
+            else:
+                stack.extend(reversed(node.children))
 
     def get_path(self) -> str:
-        """获取节点路径"""
-        path = []
-        current = self
-        while current:
-            path.append(current.title)
-            current = current.parent
-        return " > ".join(reversed(path))
+        """获取节点路径（基于父节点的缓存路径拼接）"""
+        if self._path is None:
+            if self.parent is None:
+                self._path = self.title
+            else:
+                self._path = f"{self.parent.get_path()} > {self.title}"
+        return self._path
 
 
 class WorkflowEngine:
@@ -123,7 +177,7 @@ class WorkflowEngine:
     def _clean_document_content(self, content: str) -> str:
         """清理文档内容"""
         # 移除多余的空行
-        content = re.sub(r'\n\s*\n', '\n\n', content)
+        content = _BLANK_LINES_RE.sub('\n\n', content)
         # 移除行首行尾空格
         lines = [line.strip() for line in content.split('\n')]
         return '\n'.join(lines)
@@ -191,20 +245,17 @@ class WorkflowEngine:
                 return state
 
             # 获取所有叶子节点
-            leaf_nodes = []
-            for root_node in state.section_tree:
-                leaf_nodes.extend(root_node.get_all_leaf_nodes())
+            leaf_nodes = list(chain.from_iterable(
+                root_node.get_all_leaf_nodes() for root_node in state.section_tree
+            ))
 
             logger.info(f"找到{len(leaf_nodes)}个叶子节点，开始并发生成")
 
-            # 并发生成所有叶子节点内容
-            tasks = []
-            for leaf_node in leaf_nodes:
-                task = self._generate_single_leaf_content(leaf_node, state.document_content)
-                tasks.append(task)
-
-            # 等待所有任务完成
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 并发生成所有叶子节点内容，并发数受workflow并发配置限制
+            results = await self._run_with_concurrency_limit(
+                lambda leaf_node: self._generate_single_leaf_content(leaf_node, state.document_content),
+                leaf_nodes
+            )
 
             # 处理结果
             success_count = 0
@@ -267,17 +318,11 @@ class WorkflowEngine:
             for root_node in state.section_tree:
                 parent_nodes.extend(self._collect_parent_nodes(root_node))
 
-            logger.info(f"找到{len(parent_nodes)}个父节点，开始并行生成总结")
-
-            # 并行生成所有父节点总结
-            tasks = []
-            for parent_node in parent_nodes:
-                task = self._generate_single_parent_summary(parent_node, state.document_content)
-                tasks.append(task)
+            logger.info(f"找到{len(parent_nodes)}个父节点，开始批量生成总结")
 
-            # 等待所有任务完成
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 批量生成所有父节点总结
+            if parent_nodes:
+                results = await self._generate_parent_summaries_batch(parent_nodes, state.document_content)
 
                 # 处理结果
                 success_count = 0
@@ -355,9 +400,14 @@ class WorkflowEngine:
                 state.error = "章节树未构建，无法进行差异化处理"
                 return state
 
-            # 对所有节点进行差异化处理
-            for root_node in state.section_tree:
-                await self._differentiate_node_recursive(root_node)
+            # 对所有已生成内容的节点并发进行差异化处理，并发数受workflow并发配置限制
+            nodes = list(chain.from_iterable(
+                self._collect_differentiable_nodes(root_node) for root_node in state.section_tree
+            ))
+            results = await self._run_with_concurrency_limit(self._differentiate_single_node, nodes)
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
 
             # 更新sections列表
             state.sections = self._tree_to_sections_list(state.section_tree)
@@ -373,23 +423,29 @@ class WorkflowEngine:
             state.error = str(e)
             return state
 
-    async def _differentiate_node_recursive(self, node: SectionNode):
-        """递归对节点进行差异化处理"""
-        # 处理当前节点
-        if node.content and node.is_generated:
-            logger.info(f"差异化处理节点: {node.title}")
+    def _collect_differentiable_nodes(self, node: SectionNode) -> List[SectionNode]:
+        """收集需要差异化处理的节点（已生成内容），按前序顺序返回"""
+        nodes = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.content and current.is_generated:
+                nodes.append(current)
+            stack.extend(reversed(current.children))
 
-            result = await llm_service.differentiate_content(node.content)
+        return nodes
 
-            if result["status"] == "success":
-                node.differentiated_content = result["differentiated_content"]
-            else:
-                logger.error(f"节点差异化失败: {result.get('error')}")
-                node.differentiated_content = node.content
+    async def _differentiate_single_node(self, node: SectionNode):
+        """对单个节点进行差异化处理"""
+        logger.info(f"差异化处理节点: {node.title}")
 
-        # 递归处理子节点
-        for child in node.children:
-            await self._differentiate_node_recursive(child)
+        result = await llm_service.differentiate_content(node.content)
+
+        if result["status"] == "success":
+            node.differentiated_content = result["differentiated_content"]
+        else:
+            logger.error(f"节点差异化失败: {result.get('error')}")
+            node.differentiated_content = node.content
 
     async def _finalize(self, state: WorkflowState) -> WorkflowState:
         """完成节点"""
@@ -410,7 +466,10 @@ class WorkflowEngine:
 
     def _parse_outline_to_tree(self, outline: str) -> List[SectionNode]:
         """解析提纲为层次化的章节树 - 专门处理数字编号格式"""
-        lines = outline.split('\n')
+        return self._parse_lines_to_tree(outline.split('\n'))
+
+    def _parse_lines_to_tree(self, lines: Iterable[str]) -> List[SectionNode]:
+        """由已切分的提纲行构建章节树，调用方可复用同一份行列表"""
         root_nodes = []
         node_stack = []  # 用于跟踪当前层级的节点栈
         order_counter = 0
@@ -448,37 +507,16 @@ class WorkflowEngine:
 
     def _parse_numbered_title(self, line: str) -> tuple[int, str]:
         """解析数字编号格式的标题，返回(级别, 标题)"""
-        line = line.strip()
-
-        # 匹配各种数字编号格式 - 按照从复杂到简单的顺序匹配
-        patterns = [
-            (r'^(\d+)\.(\d+)\.(\d+)\.(\d+)\.(\d+)\s+(.+)$', 5),  # 1.1.1.1.1 标题
-            (r'^(\d+)\.(\d+)\.(\d+)\.(\d+)\s+(.+)$', 4),         # 1.1.1.1 标题
-            (r'^(\d+)\.(\d+)\.(\d+)\s+(.+)$', 3),                # 1.1.1 标题
-            (r'^(\d+)\.(\d+)\s+(.+)$', 2),                       # 1.1 标题
-            (r'^(\d+)\.\s+(.+)$', 1),                            # 1. 标题
-        ]
-
-        for pattern, level in patterns:
-            match = re.match(pattern, line)
-            if match:
-                # 提取标题部分（最后一个捕获组）
-                title = match.groups()[-1].strip()
-                return level, title
-
-        # 如果没有匹配到数字编号格式，检查是否是纯文本标题
-        if line and not line.startswith('#') and not line.startswith('-') and not line.startswith('*'):
-            # 可能是没有编号的标题，默认为1级
-            return 1, line
-
-        return 0, ""  # 无法解析
+        return _parse_numbered_title_line(line)
     
     def _tree_to_sections_list(self, tree: List[SectionNode]) -> List[Dict[str, Any]]:
         """将章节树转换为扁平的章节列表"""
         sections = []
 
-        def traverse_node(node: SectionNode):
-            # 添加当前节点
+        # 显式栈前序遍历，与递归遍历的输出顺序一致
+        stack = list(reversed(tree))
+        while stack:
+            node = stack.pop()
             sections.append({
                 "title": node.title,
                 "level": node.level,
@@ -490,14 +528,7 @@ class WorkflowEngine:
                 "is_leaf": node.is_leaf,
                 "children_count": len(node.children)
             })
-
-            # 递归遍历子节点
-            for child in node.children:
-                traverse_node(child)
-
-        # 遍历所有根节点
-        for root_node in tree:
-            traverse_node(root_node)
+            stack.extend(reversed(node.children))
 
         return sections
     
@@ -579,33 +610,82 @@ class WorkflowEngine:
             return []
 
     def _collect_parent_nodes(self, node: SectionNode) -> List[SectionNode]:
-        """收集所有父节点（非叶子节点）"""
+        """收集所有父节点（非叶子节点），按前序顺序返回"""
         parent_nodes = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            # 叶子节点没有子节点，无需入栈
+            if not current.is_leaf:
+                parent_nodes.append(current)
+                stack.extend(reversed(current.children))
 
-        # 如果不是叶子节点，则是父节点
-        if not node.is_leaf:
-            parent_nodes.append(node)
+        return parent_nodes
 
-        # 递归收集子节点中的父节点
-        for child in node.children:
-            parent_nodes.extend(self._collect_parent_nodes(child))
+    def _combine_children_content(self, parent_node: SectionNode) -> str:
+        """合并父节点下所有子节点的内容"""
+        return "\n\n".join(
+            f"章节：{child.title}\n{child.content}"
+            for child in parent_node.children
+            if child.content
+        )
 
-        return parent_nodes
+    async def _generate_parent_summaries_batch(self, parent_nodes: List[SectionNode],
+                                               document_content: str) -> List[Any]:
+        """通过批量接口生成父节点总结，批量调用失败时回退为逐个并发生成"""
+        results: List[Any] = [None] * len(parent_nodes)
+        items = []
+        indices = []
+
+        for i, parent_node in enumerate(parent_nodes):
+            children_content = self._combine_children_content(parent_node)
+            if not children_content:
+                results[i] = {"status": "error", "error": "子节点内容为空"}
+                continue
+
+            items.append({
+                "parent_title": parent_node.title,
+                "parent_path": parent_node.get_path(),
+                "children_content": children_content,
+                "document_content": document_content
+            })
+            indices.append(i)
+
+        if items:
+            try:
+                batch_results = await llm_service.batch_generate_parent_summary(items)
+            except Exception as e:
+                logger.warning(f"批量生成父节点总结失败: {e}，回退为逐个并发生成")
+                batch_results = await self._run_with_concurrency_limit(
+                    lambda i: self._generate_single_parent_summary(parent_nodes[i], document_content),
+                    indices
+                )
+
+            for i, result in zip(indices, batch_results):
+                results[i] = result
+
+        return results
+
+    async def _run_with_concurrency_limit(self, func: Callable[[Any], Awaitable[Any]],
+                                          items: List[Any]) -> List[Any]:
+        """按workflow并发配置并发执行func(item)，结果顺序与items一致，异常作为结果返回"""
+        semaphore = asyncio.Semaphore(config_manager.get_max_concurrency())
+
+        async def run_with_limit(item: Any) -> Any:
+            async with semaphore:
+                return await func(item)
+
+        return await asyncio.gather(*(run_with_limit(item) for item in items), return_exceptions=True)
 
     async def _generate_single_parent_summary(self, parent_node: SectionNode, document_content: str) -> Dict[str, Any]:
         """生成单个父节点总结"""
         try:
             # 收集所有子节点的内容
-            children_content = []
-            for child in parent_node.children:
-                if child.content:
-                    children_content.append(f"章节：{child.title}\n{child.content}")
+            combined_content = self._combine_children_content(parent_node)
 
-            if not children_content:
+            if not combined_content:
                 return {"status": "error", "error": "子节点内容为空"}
 
-            combined_content = "\n\n".join(children_content)
-
             # 生成父节点总结
             result = await llm_service.generate_parent_summary(
                 parent_title=parent_node.title,
@@ -625,34 +705,13 @@ class WorkflowEngine:
             return content
 
         try:
-            # 移除markdown标题标记
-            content = re.sub(r'^#{1,6}\s+', '', content, flags=re.MULTILINE)
-
-            # 移除粗体和斜体标记
-            content = re.sub(r'\*\*([^*]+)\*\*', r'\1', content)  # 粗体
-            content = re.sub(r'\*([^*]+)\*', r'\1', content)      # 斜体
-            content = re.sub(r'__([^_]+)__', r'\1', content)      # 粗体
-            content = re.sub(r'_([^_]+)_', r'\1', content)        # 斜体
-
-            # 移除列表标记
-            content = re.sub(r'^[\s]*[-*+]\s+', '', content, flags=re.MULTILINE)
-            content = re.sub(r'^[\s]*\d+\.\s+', '', content, flags=re.MULTILINE)
-
-            # 移除代码块标记
-            content = re.sub(r'```[\s\S]*?```', '', content)  # 代码块
-            content = re.sub(r'`([^`]+)`', r'\1', content)    # 行内代码
-
-            # 移除链接标记
-            content = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', content)
-
-            # 移除引用标记
-            content = re.sub(r'^>\s+', '', content, flags=re.MULTILINE)
-
-            # 移除水平分割线
-            content = re.sub(r'^[-*_]{3,}$', '', content, flags=re.MULTILINE)
+            # 不含任何markdown标记时跳过逐项替换
+            if not _MARKDOWN_MARKER_RE.search(content):
+                return _EXTRA_BLANK_LINES_RE.sub('\n\n', content).strip()
 
-            # 清理多余的空行
-            content = re.sub(r'\n{3,}', '\n\n', content)
+            # 按顺序执行预编译的替换规则
+            for pattern, replacement in _MARKDOWN_CLEANUP_RULES:
+                content = pattern.sub(replacement, content)
 
             # 清理首尾空白
             content = content.strip()
@@ -1,13 +1,68 @@
 from typing import Tuple, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+import hashlib
+import http.client
+import json
+import os
+import socket
+import sys
 import time
 import threading
+import uuid
 
 import gradio as gr
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from requests_toolbelt.multipart.encoder import MultipartEncoder
 
 # 后端API基础URL
 API_BASE_URL = "http://localhost:8000/api"
 
+# 输出文件列表缓存有效期（秒）
+OUTPUT_FILES_CACHE_TTL = 5.0
+
+# 任务状态轮询的退避参数（秒）
+POLL_INITIAL_DELAY = 0.5
+POLL_BACKOFF_FACTOR = 1.6
+POLL_MAX_DELAY = 8.0
+
+# 长轮询时服务端最长挂起时间（秒）
+POLL_LONG_WAIT = 10.0
+
+# 上传文件统一使用的multipart内容类型，服务端按扩展名识别文件类型
+UPLOAD_CONTENT_TYPE = "application/octet-stream"
+
+# 超过该大小的文件在Linux上使用sendfile零拷贝上传
+SENDFILE_THRESHOLD = 16 * 1024 * 1024
+
+
+class _DigestReader:
+    """包装文件对象，MultipartEncoder流式读取时同步更新哈希"""
+
+    def __init__(self, fh, digest):
+        self._fh = fh
+        self._digest = digest
+
+    @property
+    def len(self) -> int:
+        """剩余未读取的字节数，供MultipartEncoder计算请求长度"""
+        return os.fstat(self._fh.fileno()).st_size - self._fh.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fh.read(size)
+        self._digest.update(chunk)
+        return chunk
+
+
+def _format_size_mb(size: int) -> str:
+    """将字节数格式化为保留一位小数的MB字符串（与f"{size/1024/1024:.1f}"一致，恰为一半时向偶数舍入）"""
+    tenths, remainder = divmod(size * 10, 1 << 20)
+    if remainder > (1 << 19) or (remainder == (1 << 19) and tenths % 2):
+        tenths += 1
+    return f"{tenths // 10}.{tenths % 10}MB"
+
 
 class AIBiddingApp:
     """AI投标方案生成系统前端应用"""
@@ -16,7 +71,113 @@ class AIBiddingApp:
         self.current_project_id = None
         self.current_task_id = None
         self.progress_thread = None
-        self.stop_progress = False
+        self._stop_event = threading.Event()
+        # 当前监控线程持有的SSE响应，停止监控时据此中断阻塞中的读取
+        self._event_response: Optional[requests.Response] = None
+        self._monitor_lock = threading.Lock()
+
+        # 复用连接池，避免每次请求都重新建立TCP连接；
+        # GET请求遇到后端短暂的502/503/504时按指数退避自动重试（POST不重试，避免重复提交任务）
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+        self.session.headers.update({
+            "User-Agent": "ai-bidding-frontend",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+
+        # 需求分析结果缓存：文档内容哈希 -> 分析结果
+        self._analysis_cache: dict[str, str] = {}
+        # 服务端文件路径 -> 内容哈希（sendfile上传时为后台计算中的Future）
+        self._path_to_hash: dict[str, "Optional[str] | Future[str]"] = {}
+        self._digest_executor = ThreadPoolExecutor(max_workers=1)
+
+        # 输出文件列表缓存：(缓存时间, 结果)
+        self._files_cache: Tuple[float, Optional[str]] = (0.0, None)
+
+        # 项目信息缓存：项目ID -> 已生成最终文档的项目信息
+        self._project_cache: dict[str, dict] = {}
+
+    @staticmethod
+    def _file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+        """分块计算文件内容的sha256"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _uses_sendfile(size: int) -> bool:
+        """判断该大小的文件是否走sendfile零拷贝上传"""
+        return (
+            sys.platform == "linux"
+            and size > SENDFILE_THRESHOLD
+            and urlsplit(API_BASE_URL).scheme == "http"
+        )
+
+    def _post_file(self, path: str, digest=None) -> requests.Response:
+        """以流式multipart上传文件，避免整个文件读入内存；传入digest时边读边计算哈希"""
+        size = os.path.getsize(path)
+        if self._uses_sendfile(size):
+            return self._post_file_sendfile(path, size)
+
+        with open(path, "rb") as fh:
+            body = fh if digest is None else _DigestReader(fh, digest)
+            encoder = MultipartEncoder(
+                fields={"file": (os.path.basename(path), body, UPLOAD_CONTENT_TYPE)}
+            )
+            return self.session.post(
+                f"{API_BASE_URL}/documents/upload",
+                data=encoder,
+                headers={"Content-Type": encoder.content_type}
+            )
+
+    def _post_file_sendfile(self, path: str, size: int) -> requests.Response:
+        """手工拼装multipart请求，文件内容通过os.sendfile在内核中直接写入socket"""
+        boundary = uuid.uuid4().hex
+        filename = os.path.basename(path).replace('"', "%22")
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {UPLOAD_CONTENT_TYPE}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        url = urlsplit(API_BASE_URL)
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80)
+        try:
+            conn.putrequest("POST", f"{url.path}/documents/upload")
+            conn.putheader("Content-Type", f"multipart/form-data; boundary={boundary}")
+            conn.putheader("Content-Length", str(len(head) + size + len(tail)))
+            conn.endheaders()
+            conn.send(head)
+
+            with open(path, "rb") as fh:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(conn.sock.fileno(), fh.fileno(), offset, size - offset)
+                    if sent == 0:
+                        # 文件在发送过程中变短，已声明的Content-Length无法满足
+                        raise OSError(f"文件在上传过程中被截断: {path} ({offset}/{size} 字节)")
+                    offset += sent
+
+            conn.send(tail)
+            raw = conn.getresponse()
+
+            response = requests.Response()
+            response.status_code = raw.status
+            response._content = raw.read()
+            response.encoding = "utf-8"
+            return response
+        finally:
+            conn.close()
 
     def upload_document(self, file) -> Tuple[str, str]:
         """上传招标文档"""
@@ -24,11 +185,18 @@ class AIBiddingApp:
             return "请选择招标文档", ""
 
         try:
-            files = {"file": (file.name, open(file.name, "rb"))}
-            response = requests.post(f"{API_BASE_URL}/documents/upload", files=files)
+            if self._uses_sendfile(os.path.getsize(file.name)):
+                # sendfile在内核中复制数据，无法边读边算；与上传并行计算哈希，两者共享页缓存
+                digest = self._digest_executor.submit(self._file_digest, file.name)
+                response = self._post_file(file.name)
+            else:
+                sha256 = hashlib.sha256()
+                response = self._post_file(file.name, sha256)
+                digest = sha256.hexdigest()
 
             if response.status_code == 200:
                 result = response.json()
+                self._path_to_hash[result['file_path']] = digest
                 return f"✅ 招标文档上传成功: {result['file_name']}", result['file_path']
             else:
                 return f"❌ 上传失败: {response.text}", ""
@@ -42,8 +210,7 @@ class AIBiddingApp:
             return "使用默认模板", ""
 
         try:
-            files = {"file": (file.name, open(file.name, "rb"))}
-            response = requests.post(f"{API_BASE_URL}/documents/upload", files=files)
+            response = self._post_file(file.name)
 
             if response.status_code == 200:
                 result = response.json()
@@ -54,13 +221,33 @@ class AIBiddingApp:
         except Exception as e:
             return f"❌ 模板上传异常: {str(e)}", ""
 
+    def upload_both(self, tender_file, template_file) -> Tuple[str, str, str, str]:
+        """并行上传招标文档和模板文档"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tender_future = executor.submit(self.upload_document, tender_file)
+            template_future = executor.submit(self.upload_template, template_file)
+            tender_status, tender_path = tender_future.result()
+            template_status, template_path = template_future.result()
+
+        return tender_status, tender_path, template_status, template_path
+
     def analyze_document(self, file_path: str) -> Tuple[str, str]:
         """分析文档需求"""
         if not file_path:
             return "请先上传文档", ""
 
+        digest = self._path_to_hash.get(file_path)
+        if isinstance(digest, Future):
+            try:
+                digest = digest.result()
+            except OSError:
+                digest = None  # 哈希计算失败时不使用缓存
+            self._path_to_hash[file_path] = digest
+        if digest and digest in self._analysis_cache:
+            return "✅ 需求分析完成", self._analysis_cache[digest]
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{API_BASE_URL}/documents/analyze",
                 json={"file_path": file_path}
             )
@@ -68,6 +255,8 @@ class AIBiddingApp:
             if response.status_code == 200:
                 result = response.json()
                 analysis = result['analysis']
+                if digest:
+                    self._analysis_cache[digest] = analysis
                 return "✅ 需求分析完成", analysis
             else:
                 return f"❌ 分析失败: {response.text}", ""
@@ -87,7 +276,7 @@ class AIBiddingApp:
                 "enable_differentiation": enable_diff
             }
 
-            response = requests.post(f"{API_BASE_URL}/projects/", json=data)
+            response = self.session.post(f"{API_BASE_URL}/projects/", json=data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -106,7 +295,7 @@ class AIBiddingApp:
 
         try:
             data = {"requirements_analysis": requirements}
-            response = requests.post(f"{API_BASE_URL}/generation/outline", json=data)
+            response = self.session.post(f"{API_BASE_URL}/generation/outline", json=data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -133,7 +322,7 @@ class AIBiddingApp:
                 "template_path": template_file_path if template_file_path else None
             }
 
-            response = requests.post(f"{API_BASE_URL}/generation/full", json=data)
+            response = self.session.post(f"{API_BASE_URL}/generation/full", json=data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -151,74 +340,152 @@ class AIBiddingApp:
 
     def start_progress_monitoring(self):
         """启动进度监控线程"""
-        self.stop_progress = False
         if self.progress_thread and self.progress_thread.is_alive():
-            self.stop_progress = True
-            self.progress_thread.join()
+            self._stop_progress_monitoring()
+            self.progress_thread.join(timeout=3)
 
-        self.progress_thread = threading.Thread(target=self._monitor_progress)
+        # 每个监控线程持有独立的停止事件，避免新旧线程共享标志位
+        self._stop_event = threading.Event()
+        self.progress_thread = threading.Thread(
+            target=self._monitor_progress, args=(self._stop_event,)
+        )
         self.progress_thread.daemon = True
         self.progress_thread.start()
 
-    def _monitor_progress(self):
-        """监控进度的后台线程"""
-        while not self.stop_progress and self.current_task_id:
+    def _stop_progress_monitoring(self):
+        """通知监控线程停止，并关闭其SSE连接使阻塞中的读取立即返回"""
+        with self._monitor_lock:
+            self._stop_event.set()
+            response, self._event_response = self._event_response, None
+
+        if response is None:
+            return
+        # 仅close()不会唤醒另一线程中阻塞的recv，需先shutdown底层socket
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is not None:
             try:
-                status_info = self.check_task_status()
-                if "完成" in status_info or "失败" in status_info:
-                    break
-                time.sleep(2)  # 每2秒检查一次
-            except:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        response.close()
+
+    def _monitor_progress(self, stop_event: threading.Event):
+        """监控进度的后台线程，优先使用SSE推送，失败时退回轮询"""
+        try:
+            self._consume_task_events(stop_event)
+        except Exception:
+            self._poll_progress(stop_event)
+
+    def _consume_task_events(self, stop_event: threading.Event):
+        """消费后端推送的任务状态事件"""
+        url = f"{API_BASE_URL}/generation/task/{self.current_task_id}/events"
+        # 事件流不压缩，避免压缩缓冲导致推送延迟
+        headers = {"Accept-Encoding": "identity"}
+        with self.session.get(url, stream=True, timeout=(5, None), headers=headers) as response:
+            with self._monitor_lock:
+                # 建立连接期间已被要求停止时直接退出，不再登记响应
+                if stop_event.is_set():
+                    return
+                self._event_response = response
+
+            try:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if stop_event.is_set():
+                        break
+                    if not line or not line.startswith("data:"):
+                        continue
+
+                    task = json.loads(line[len("data:"):])
+                    if task.get("status") in ("completed", "failed"):
+                        stop_event.set()
+                        self._files_cache = (0.0, None)
+                        break
+            finally:
+                with self._monitor_lock:
+                    if self._event_response is response:
+                        self._event_response = None
+
+    def _poll_progress(self, stop_event: threading.Event):
+        """轮询任务状态，间隔按指数退避增长，停止事件触发时立即退出"""
+        delay = POLL_INITIAL_DELAY
+        while self.current_task_id and not stop_event.is_set():
+            try:
+                self.check_task_status(wait=POLL_LONG_WAIT)
+            except Exception:
+                break
+            if stop_event.wait(delay):
                 break
+            delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_DELAY)
 
-    def check_task_status(self) -> Tuple[str, int, gr.update]:
-        """检查任务状态"""
+    def check_task_status(self, wait: float = 0) -> Tuple[str, int, gr.update]:
+        """检查任务状态，wait>0时由服务端挂起直到状态变化"""
         if not self.current_task_id:
             return "没有正在运行的任务", 0, gr.update(visible=False)
 
         try:
-            response = requests.get(f"{API_BASE_URL}/generation/task/{self.current_task_id}")
+            if wait > 0:
+                response = self.session.get(
+                    f"{API_BASE_URL}/generation/task/{self.current_task_id}",
+                    params={"wait": wait},
+                    timeout=wait + 10
+                )
+            else:
+                response = self.session.get(f"{API_BASE_URL}/generation/task/{self.current_task_id}")
 
             if response.status_code == 200:
-                result = response.json()
-                task = result['task']
-
+                task = response.json()['task']
                 status = task['status']
-                progress = task.get('progress', 0)
-                current_step = task.get('current_step', '')
-                error = task.get('error', '')
 
                 if status == "running":
-                    status_text = f"🔄 任务进行中... {current_step}"
-                    return status_text, progress, gr.update(visible=False)
+                    step = task.get('current_step', '')
+                    return f"🔄 任务进行中... {step}", task.get('progress', 0), gr.update(visible=False)
                 elif status == "completed":
-                    status_text = f"✅ 任务完成! 可以下载投标书了"
-                    self.stop_progress = True
-                    return status_text, 100, gr.update(visible=True)
+                    self._stop_event.set()
+                    self._files_cache = (0.0, None)  # 有新文件生成，使缓存失效
+                    if self.current_project_id not in self._project_cache:
+                        self._prefetch_project()
+                    return "✅ 任务完成! 可以下载投标书了", 100, gr.update(visible=True)
                 elif status == "failed":
-                    status_text = f"❌ 任务失败: {error}"
-                    self.stop_progress = True
-                    return status_text, 0, gr.update(visible=False)
+                    self._stop_event.set()
+                    return f"❌ 任务失败: {task.get('error', '')}", 0, gr.update(visible=False)
                 else:
-                    return f"📋 任务状态: {status}", progress, gr.update(visible=False)
+                    return f"📋 任务状态: {status}", task.get('progress', 0), gr.update(visible=False)
             else:
                 return f"❌ 查询失败: {response.text}", 0, gr.update(visible=False)
 
         except Exception as e:
             return f"❌ 查询异常: {str(e)}", 0, gr.update(visible=False)
 
+    def _prefetch_project(self):
+        """预取已完成项目的信息，使首次下载无需再请求后端"""
+        try:
+            response = self.session.get(f"{API_BASE_URL}/projects/{self.current_project_id}")
+            if response.status_code == 200:
+                project = response.json()
+                if project.get('final_document_path'):
+                    self._project_cache[self.current_project_id] = project
+        except Exception:
+            pass
+
     def download_result(self) -> str:
         """下载生成的投标书"""
         if not self.current_project_id:
             return "❌ 没有可下载的文件"
 
+        project = self._project_cache.get(self.current_project_id)
+        if project:
+            download_url = f"http://localhost:8000/api/projects/{self.current_project_id}/download"
+            return f"✅ 文件准备就绪！请访问下载链接：{download_url}"
+
         try:
             # 获取项目信息
-            response = requests.get(f"{API_BASE_URL}/projects/{self.current_project_id}")
+            response = self.session.get(f"{API_BASE_URL}/projects/{self.current_project_id}")
 
             if response.status_code == 200:
                 project = response.json()
                 if project.get('final_document_path'):
+                    self._project_cache[self.current_project_id] = project
                     # 返回下载链接信息
                     download_url = f"http://localhost:8000/api/projects/{self.current_project_id}/download"
                     return f"✅ 文件准备就绪！请访问下载链接：{download_url}"
@@ -232,23 +499,25 @@ class AIBiddingApp:
 
     def get_output_files(self) -> str:
         """获取输出文件列表"""
+        cached_at, cached_result = self._files_cache
+        if cached_result is not None and time.monotonic() - cached_at < OUTPUT_FILES_CACHE_TTL:
+            return cached_result
+
         try:
-            response = requests.get(f"{API_BASE_URL}/generation/outputs")
+            response = self.session.get(f"{API_BASE_URL}/generation/outputs")
 
             if response.status_code == 200:
                 result = response.json()
                 files = result['files']
 
-                if not files:
-                    return "暂无输出文件"
-
-                file_list = []
-                for file in files[:10]:  # 只显示最近10个文件
-                    name = file['name']
-                    size_mb = file['size'] / (1024 * 1024)
-                    file_list.append(f"📄 {name} ({size_mb:.1f}MB)")
+                # 只显示最近10个文件，大小以0.1MB为单位做整数舍入
+                output = "\n".join(
+                    f"📄 {file['name']} ({_format_size_mb(file['size'])})"
+                    for file in files[:10]
+                ) or "暂无输出文件"
 
-                return "\n".join(file_list)
+                self._files_cache = (time.monotonic(), output)
+                return output
             else:
                 return f"❌ 获取失败: {response.text}"
 
@@ -313,6 +582,13 @@ def create_interface():
             outputs=[template_status, template_path]
         )
 
+        upload_both_btn = gr.Button("📤 同时上传招标文档和模板", variant="primary")
+        upload_both_btn.click(
+            app.upload_both,
+            inputs=[tender_file, template_file],
+            outputs=[tender_status, tender_path, template_status, template_path]
+        )
+
         # 生成控制区域
         gr.Markdown("---")
         gr.Markdown("## 🚀 投标书生成")
@@ -370,7 +646,8 @@ def create_interface():
     return interface
 
 
-if __name__ == "__main__":
+def launch():
+    """创建界面并启动Gradio前端服务（阻塞直到服务停止）"""
     interface = create_interface()
     interface.launch(
         server_name="127.0.0.1",
@@ -378,3 +655,7 @@ if __name__ == "__main__":
         share=False,
         debug=False
     )
+
+
+if __name__ == "__main__":
+    launch()
@@ -5,26 +5,30 @@ AI投标方案生成系统启动脚本
 
 import subprocess
 import sys
+import threading
 import time
 import signal
 import os
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from pathlib import Path
 
+import requests
+
+# 启动探测复用同一个会话，避免每次探测重新建立连接
+_probe_session = requests.Session()
+
 
 def check_dependencies():
-    """检查依赖是否安装"""
-    try:
-        import fastapi
-        import gradio
-        import langchain
-        import langgraph
-        import unstructured
-        print("✅ 依赖检查通过")
-        return True
-    except ImportError as e:
-        print(f"❌ 缺少依赖: {e}")
-        print("请运行: make install 或 pip install -e .")
-        return False
+    """检查依赖是否安装（只查找模块，不执行导入）"""
+    for module_name in ("fastapi", "gradio", "langchain", "langgraph", "unstructured"):
+        if find_spec(module_name) is None:
+            print(f"❌ 缺少依赖: {module_name}")
+            print("请运行: make install 或 pip install -e .")
+            return False
+
+    print("✅ 依赖检查通过")
+    return True
 
 
 def check_config():
@@ -45,10 +49,13 @@ def check_config():
 
 
 def create_directories():
-    """创建必要的目录"""
+    """创建必要的目录（一次扫描当前目录，只创建缺失的目录）"""
     dirs = ["uploads", "outputs", "logs"]
+    with os.scandir(".") as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
     for dir_name in dirs:
-        Path(dir_name).mkdir(exist_ok=True)
+        if dir_name not in existing:
+            os.makedirs(dir_name, exist_ok=True)
     print("✅ 目录创建完成")
 
 
@@ -64,26 +71,38 @@ def start_backend():
     ])
 
 
+def _run_frontend():
+    """在当前进程中运行Gradio前端"""
+    from frontend.app import launch
+
+    launch()
+
+
 def start_frontend():
-    """启动前端服务"""
+    """启动前端服务（与启动器同进程的后台线程）"""
     print("🚀 启动前端服务...")
-    return subprocess.Popen([
-        sys.executable, "-m", "frontend.app"
-    ])
+    frontend_thread = threading.Thread(target=_run_frontend, name="frontend", daemon=True)
+    frontend_thread.start()
+    return frontend_thread
 
 
-def wait_for_service(url, timeout=30):
+def wait_for_service(url, timeout=30, interval=0.2):
     """等待服务启动"""
-    import requests
-    
-    for i in range(timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
         try:
-            response = requests.get(url, timeout=1)
-            if response.status_code == 200:
-                return True
-        except:
+            # 只关心状态码，stream=True使就绪时无需下载页面正文
+            with _probe_session.get(url, timeout=0.5, stream=True) as response:
+                if response.status_code == 200:
+                    return True
+                # 未就绪时读完（通常很小的）响应体，连接才能放回连接池供下次探测复用
+                body = response.text
+                if response.status_code >= 500:
+                    print(f"❌ 服务返回错误: {response.status_code} {body}")
+                    return False
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             pass
-        time.sleep(1)
+        time.sleep(interval)
     return False
 
 
@@ -92,24 +111,30 @@ def main():
     print("🤖 AI投标方案生成系统启动器")
     print("=" * 50)
     
+    # 并行执行依赖检查、配置检查和目录创建
+    executor = ThreadPoolExecutor(max_workers=3)
+    deps_future = executor.submit(check_dependencies)
+    config_future = executor.submit(check_config)
+    dirs_future = executor.submit(create_directories)
+    executor.shutdown(wait=False)
+
     # 检查依赖
-    if not check_dependencies():
+    if not deps_future.result():
         sys.exit(1)
     
-    # 检查配置
-    if not check_config():
-        sys.exit(1)
-    
-    # 创建目录
-    create_directories()
-    
     # 启动服务
     backend_process = None
-    frontend_process = None
     
     try:
-        # 启动后端
+        # 依赖就绪后立即启动后端，与其余检查重叠
         backend_process = start_backend()
+
+        # 检查配置（SystemExit同样会先执行finally中的后端清理）
+        if not config_future.result():
+            sys.exit(1)
+
+        # 创建目录
+        dirs_future.result()
         
         # 等待后端启动
         print("⏳ 等待后端服务启动...")
@@ -120,11 +145,15 @@ def main():
             return
         
         # 启动前端
-        frontend_process = start_frontend()
+        frontend_thread = start_frontend()
         
         # 等待前端启动
         print("⏳ 等待前端服务启动...")
-        time.sleep(5)  # Gradio启动需要一些时间
+        if wait_for_service("http://localhost:7860/"):
+            print("✅ 前端服务启动成功")
+        else:
+            print("❌ 前端服务启动失败")
+            return
         
         print("\n" + "=" * 50)
         print("🎉 系统启动成功!")
@@ -134,23 +163,23 @@ def main():
         print("=" * 50)
         print("按 Ctrl+C 停止服务")
         
-        # 等待用户中断
+        # 等待用户中断，前端线程意外退出时停止服务
         while True:
             time.sleep(1)
+            if not frontend_thread.is_alive():
+                print("❌ 前端服务已退出")
+                sys.exit(1)
             
     except KeyboardInterrupt:
         print("\n🛑 正在停止服务...")
         
     finally:
         # 清理进程
+        # 前端线程为守护线程，随主进程退出
         if backend_process:
             backend_process.terminate()
             backend_process.wait()
         
-        if frontend_process:
-            frontend_process.terminate()
-            frontend_process.wait()
-        
         print("✅ 服务已停止")
 
 
@@ -1,8 +1,12 @@
 import pytest
 from pathlib import Path
+import tempfile
 import unittest
+from unittest import mock
 import asyncio
 
+from langchain_core.documents import Document
+
 from backend.services.document_parser import document_parser
 from backend.services.llm_service import llm_service
 
@@ -26,11 +30,31 @@ class TestDocumentParser(unittest.TestCase):
         self.assertGreater(len(result["documents"]), 0)
         self.assertGreater(len(result["chunks"]), 0)
 
+    def test_parse_document_cache(self):
+        """测试相同文件重复解析时命中缓存，文件修改后重新解析"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "tender.txt"
+            path.write_text("招标文件内容", encoding="utf-8")
+
+            with mock.patch("backend.services.document_parser.UnstructuredLoader") as loader_cls:
+                loader_cls.return_value.load.side_effect = lambda: [
+                    Document(page_content=path.read_text(encoding="utf-8"))
+                ]
+
+                first = document_parser.parse_document(path)
+                second = document_parser.parse_document(path)
+                self.assertIs(first, second)
+                self.assertEqual(loader_cls.call_count, 1)
+
+                path.write_text("修改后的招标文件内容", encoding="utf-8")
+                third = document_parser.parse_document(path)
+                self.assertEqual(loader_cls.call_count, 2)
+                self.assertEqual(third["documents"][0].page_content, "修改后的招标文件内容")
+                self.assertEqual(third["content"], "修改后的招标文件内容")
+
 
 class TestLLMService(unittest.TestCase):
-    def setUp(self):
-        """设置测试环境"""
-        self.sample_content = """
+    sample_content = """
         某市智慧城市建设项目招标文件
 
         项目要求：
@@ -40,6 +64,15 @@ class TestLLMService(unittest.TestCase):
         4. 数据查询响应时间不超过3秒
         """
 
+    @classmethod
+    def setUpClass(cls):
+        """所有测试共用一个事件循环，LLM客户端的连接池可在测试间复用"""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
     # @unittest.skip("需要API密钥才能运行")
     def test_analyze_requirements(self):
         """测试需求分析功能"""
@@ -49,7 +82,7 @@ class TestLLMService(unittest.TestCase):
             self.assertIn("status", result)
             self.assertIn("analysis", result)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     # @unittest.skip("需要API密钥才能运行")
     def test_generate_outline(self):
@@ -61,7 +94,7 @@ class TestLLMService(unittest.TestCase):
             self.assertIn("status", result)
             self.assertIn("outline", result)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from starlette.datastructures import Headers
+from starlette.formparsers import MultiPartParser
+
+import frontend.app as frontend_app
+
+
+class _CaptureHandler(http.server.BaseHTTPRequestHandler):
+    """记录收到的上传请求并返回固定的JSON响应"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        if len(body) < length:
+            # 客户端中途断开，不再响应
+            self.close_connection = True
+            return
+
+        self.server.captured = {
+            "path": self.path,
+            "content_type": self.headers["Content-Type"],
+            "content_length": length,
+            "body": body,
+        }
+        payload = json.dumps({"file_name": "ok"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _parse_multipart(body: bytes, content_type: str):
+    """用后端同款的Starlette解析器解析multipart请求体"""
+    async def parse():
+        async def stream():
+            yield body
+
+        form = await MultiPartParser(Headers({"content-type": content_type}), stream()).parse()
+        upload = form["file"]
+        return upload.filename, await upload.read()
+
+    return asyncio.run(parse())
+
+
+class _UploadServerTestCase(unittest.TestCase):
+    """启动本地上传服务并准备一个带中文文件名的测试文件"""
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _CaptureHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api"
+        patcher = mock.patch.object(frontend_app, "API_BASE_URL", base_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name) / "招标文件 2024.docx"
+        self.content = os.urandom(256 * 1024)
+        self.path.write_bytes(self.content)
+
+
+class TestStreamingUpload(_UploadServerTestCase):
+    def test_digest_computed_while_uploading(self):
+        """流式上传时边读边计算哈希，请求体与文件内容一致"""
+        app = frontend_app.AIBiddingApp()
+        digest = hashlib.sha256()
+        with mock.patch.object(frontend_app, "SENDFILE_THRESHOLD", len(self.content)):
+            response = app._post_file(str(self.path), digest)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(self.content).hexdigest())
+
+        captured = self.server.captured
+        filename, data = _parse_multipart(captured["body"], captured["content_type"])
+        self.assertEqual(filename, "招标文件 2024.docx")
+        self.assertEqual(data, self.content)
+
+
+@unittest.skipUnless(hasattr(os, "sendfile"), "当前平台不支持os.sendfile")
+class TestSendfileUpload(_UploadServerTestCase):
+    def test_body_round_trips(self):
+        """multipart请求体可被后端解析，文件内容与中文文件名保持不变"""
+        app = frontend_app.AIBiddingApp()
+        response = app._post_file_sendfile(str(self.path), len(self.content))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"file_name": "ok"})
+
+        captured = self.server.captured
+        self.assertEqual(captured["path"], "/api/documents/upload")
+        self.assertEqual(captured["content_length"], len(captured["body"]))
+
+        filename, data = _parse_multipart(captured["body"], captured["content_type"])
+        self.assertEqual(filename, "招标文件 2024.docx")
+        self.assertEqual(data, self.content)
+
+    def test_truncated_file_raises(self):
+        """文件在发送过程中变短时报错，而不是发送长度不符的请求"""
+        app = frontend_app.AIBiddingApp()
+        with mock.patch.object(frontend_app.os, "sendfile", return_value=0):
+            with self.assertRaises(OSError):
+                app._post_file_sendfile(str(self.path), len(self.content))
+
+
+if __name__ == "__main__":
+    unittest.main()
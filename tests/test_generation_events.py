@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+import unittest
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from backend.api.routes import generation
+
+
+def _create_app() -> FastAPI:
+    """只挂载生成路由的测试应用"""
+    app = FastAPI()
+    app.include_router(generation.router, prefix="/api")
+    return app
+
+
+class TestTaskEvents(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.task_id = str(uuid.uuid4())
+        generation.generation_tasks[self.task_id] = {
+            "status": "running",
+            "project_id": "test_project",
+            "progress": 0
+        }
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=_create_app()),
+            base_url="http://test"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        generation.generation_tasks.pop(self.task_id, None)
+        generation._task_events.pop(self.task_id, None)
+
+    async def _wait_for_waiter(self):
+        """等待请求方登记状态变化事件"""
+        for _ in range(200):
+            if self.task_id in generation._task_events:
+                return
+            await asyncio.sleep(0.01)
+        self.fail("请求方未登记任务事件")
+
+    async def test_long_poll_returns_on_progress_update(self):
+        """长轮询在任务进度更新时立即返回，而不是等到超时"""
+        started = time.monotonic()
+        request = asyncio.create_task(
+            self.client.get(f"/api/generation/task/{self.task_id}", params={"wait": 10})
+        )
+        await self._wait_for_waiter()
+        generation.update_task_progress(self.task_id, 50, "生成章节内容")
+
+        response = await asyncio.wait_for(request, timeout=5)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(response.status_code, 200)
+        task = response.json()["task"]
+        self.assertEqual(task["progress"], 50)
+        self.assertEqual(task["current_step"], "生成章节内容")
+
+    async def test_stream_emits_frame_per_change_and_closes_on_completed(self):
+        """事件流每次状态变化推送一帧，任务完成后结束"""
+        request = asyncio.create_task(
+            self.client.get(f"/api/generation/task/{self.task_id}/events")
+        )
+        await self._wait_for_waiter()
+        generation.update_task_progress(self.task_id, 50, "生成章节内容")
+        await self._wait_for_waiter()
+        generation.generation_tasks[self.task_id]["status"] = "completed"
+        generation.update_task_progress(self.task_id, 100, "完成")
+
+        response = await asyncio.wait_for(request, timeout=5)
+        self.assertEqual(response.status_code, 200)
+        frames = [
+            json.loads(line[len("data:"):])
+            for line in response.text.splitlines()
+            if line.startswith("data:")
+        ]
+        self.assertEqual([frame["progress"] for frame in frames], [0, 50, 100])
+        self.assertEqual(frames[-1]["status"], "completed")
+        self.assertNotIn(self.task_id, generation._task_events)
+
+    async def test_stream_closes_on_failed(self):
+        """任务失败时事件流推送失败状态后结束"""
+        request = asyncio.create_task(
+            self.client.get(f"/api/generation/task/{self.task_id}/events")
+        )
+        await self._wait_for_waiter()
+        generation.update_task_progress(self.task_id, 0, "任务失败", error="boom")
+
+        response = await asyncio.wait_for(request, timeout=5)
+        frames = [
+            json.loads(line[len("data:"):])
+            for line in response.text.splitlines()
+            if line.startswith("data:")
+        ]
+        self.assertEqual(frames[-1]["status"], "failed")
+        self.assertEqual(frames[-1]["error"], "boom")
+
+    async def test_unknown_task_returns_404(self):
+        """未知任务ID返回404"""
+        unknown_id = str(uuid.uuid4())
+        response = await self.client.get(f"/api/generation/task/{unknown_id}", params={"wait": 1})
+        self.assertEqual(response.status_code, 404)
+        response = await self.client.get(f"/api/generation/task/{unknown_id}/events")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.services.llm_cache import LLMCache
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_dir = Path(tmp_dir.name) / "llm"
+
+    def _make_cache(self, enabled: bool) -> LLMCache:
+        env = {"AIBIDDING_LLM_CACHE": "1" if enabled else "0"}
+        with mock.patch.dict("os.environ", env):
+            return LLMCache(cache_dir=self.cache_dir)
+
+    @staticmethod
+    def _counting_call(result):
+        """返回固定结果并记录调用次数的协程函数"""
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return result
+
+        return fn, calls
+
+    def test_hit_and_miss(self):
+        """相同输入命中缓存，不同输入重新调用"""
+        cache = self._make_cache(enabled=True)
+        fn, calls = self._counting_call({"status": "success", "content": "正文"})
+
+        first = asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        second = asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        self.assertEqual(first, {"status": "success", "content": "正文"})
+        self.assertEqual(second, first)
+        self.assertEqual(len(calls), 1)
+
+        asyncio.run(cache.cached_call(fn, ["model", "other prompt"]))
+        self.assertEqual(len(calls), 2)
+
+    def test_error_result_not_cached(self):
+        """失败结果不写入缓存，下次仍会重新调用"""
+        cache = self._make_cache(enabled=True)
+        fn, calls = self._counting_call({"status": "error", "error": "timeout"})
+
+        asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_disabled_always_calls(self):
+        """未启用时每次都调用且不写磁盘"""
+        cache = self._make_cache(enabled=False)
+        fn, calls = self._counting_call({"status": "success", "content": "正文"})
+
+        asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        asyncio.run(cache.cached_call(fn, ["model", "prompt"]))
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(self.cache_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()